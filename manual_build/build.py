@@ -4,22 +4,138 @@ ZMK Local Build Script using Docker
 Reads build.yaml and builds selected configuration using Docker
 """
 
-import yaml
+import json
 import subprocess
 import sys
 import os
+import pickle
 import shutil
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import NamedTuple
+
+# yaml is imported lazily (it costs 50-150 ms), so fast-exit paths like
+# --help, argparse errors and build-cache hits never pay for it.
+_yaml = None
+_YamlLoader = None
+
+
+def _get_yaml():
+    """Import yaml on first use and memoize the module and loader class.
+
+    Prefers libyaml's C-based parser when PyYAML was built against it (~3-10x
+    faster); falls back to the pure-Python SafeLoader otherwise. Both raise
+    yaml.YAMLError.
+    """
+    global _yaml, _YamlLoader
+    if _yaml is None:
+        import yaml
+        _yaml = yaml
+        _YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return _yaml, _YamlLoader
+
+
+class BuildEntry(NamedTuple):
+    """One build.yaml include entry, with pre-lowercased names for lookups.
+
+    Tuple fields replace the per-call dict .get() lookups the hot paths used
+    to do, and carry the lowercased shield/board so searches never re-lower.
+    """
+    shield: str
+    board: str
+    snippet: str
+    cmake_args: str
+    shield_lower: str
+    board_lower: str
+
+    @classmethod
+    def from_mapping(cls, entry):
+        shield = entry.get('shield', '')
+        board = entry.get('board', '')
+        return cls(shield, board,
+                   entry.get('snippet', ''), entry.get('cmake-args', ''),
+                   shield.lower(), board.lower())
+
+
+# Bump when the cached representation of build entries changes shape.
+_CACHE_VERSION = 2
+
+
+def _read_build_cache(cache_file, cache_key):
+    """Return the cached build list if the cache matches cache_key, else None."""
+    try:
+        with open(cache_file, 'rb') as f:
+            if f.readline() == cache_key:
+                return [BuildEntry._make(fields) for fields in pickle.load(f)]
+    except (OSError, pickle.PickleError, EOFError, ValueError, TypeError):
+        pass
+    return None
+
+
+def _write_build_cache(cache_file, cache_key, builds):
+    """Write the parsed build list to the cache, atomically via os.replace.
+
+    Entries are stored as plain tuples so the pickle stays loadable whether
+    build.py runs as a script (__main__) or is imported as a module.
+    """
+    tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(cache_key)
+            pickle.dump([tuple(entry) for entry in builds], f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        # Cache is best-effort; a read-only checkout just re-parses next time.
+        pass
+
+
+def _read_include_section(stream):
+    """Extract the `include:` list from a build.yaml stream.
+
+    Composes the node tree without constructing Python objects, then constructs
+    only the `include` section. Any other top-level keys stay as raw nodes, so
+    a large build.yaml never pays for a full parse of sections we don't read.
+    """
+    yaml, yaml_loader = _get_yaml()
+    loader = yaml_loader(stream)
+    try:
+        root = loader.get_single_node()
+        if not isinstance(root, yaml.MappingNode):
+            return []
+        for key_node, value_node in root.value:
+            if key_node.value == 'include':
+                return loader.construct_document(value_node) or []
+        return []
+    finally:
+        loader.dispose()
 
 
 def load_build_config(workspace_path):
-    """Load and parse the build.yaml configuration file."""
+    """Load and parse the build.yaml configuration file.
+
+    The parsed list is cached on disk (manual_build/.build-yaml.cache) keyed
+    by build.yaml's mtime and size, so unchanged files skip YAML entirely on
+    repeat invocations. Any edit to build.yaml invalidates the cache.
+    """
     config_file = workspace_path / "build.yaml"
+    cache_file = workspace_path / "manual_build" / ".build-yaml.cache"
+
+    try:
+        stat = os.stat(config_file)
+    except FileNotFoundError:
+        print(f"Error: {config_file} not found!")
+        sys.exit(1)
+
+    cache_key = f"{_CACHE_VERSION}:{stat.st_mtime_ns}:{stat.st_size}\n".encode()
+    builds = _read_build_cache(cache_file, cache_key)
+    if builds is not None:
+        return builds
+
+    yaml, _ = _get_yaml()
     try:
         with open(config_file, 'r') as f:
-            config = yaml.safe_load(f)
-        return config.get('include', [])
+            builds = [BuildEntry.from_mapping(entry) for entry in _read_include_section(f)]
     except FileNotFoundError:
         print(f"Error: {config_file} not found!")
         sys.exit(1)
@@ -27,22 +143,23 @@ def load_build_config(workspace_path):
         print(f"Error parsing {config_file}: {e}")
         sys.exit(1)
 
+    _write_build_cache(cache_file, cache_key, builds)
+    return builds
+
 
 def display_build_options(builds):
     """Display available build configurations."""
-    print("\n=== Available Build Configurations ===\n")
+    # Assemble the whole listing first and emit it with a single write, instead
+    # of one write-and-flush per line.
+    parts = ["\n=== Available Build Configurations ===\n\n"]
     for idx, build in enumerate(builds, 1):
-        board = build.get('board', 'N/A')
-        shield = build.get('shield', 'N/A')
-        snippet = build.get('snippet', '')
-        cmake_args = build.get('cmake-args', '')
-
-        print(f"{idx}. {shield} ({board})")
-        if snippet:
-            print(f"   └─ Snippet: {snippet}")
-        if cmake_args:
-            print(f"   └─ CMake args: {cmake_args}")
-        print()
+        parts.append(f"{idx}. {build.shield or 'N/A'} ({build.board or 'N/A'})\n")
+        if build.snippet:
+            parts.append(f"   └─ Snippet: {build.snippet}\n")
+        if build.cmake_args:
+            parts.append(f"   └─ CMake args: {build.cmake_args}\n")
+        parts.append("\n")
+    sys.stdout.write("".join(parts))
 
 
 def get_user_choice(max_choice):
@@ -62,14 +179,43 @@ def get_user_choice(max_choice):
             print("Invalid input. Please enter a number.")
 
 
+def ensure_build_directories(west_workspace_path: Path, artifacts_path: Path):
+    """Create all host-side build directories in one startup pass.
+
+    Done once so the individual build/copy steps don't each re-stat the same
+    ancestor directories with their own mkdir calls.
+    """
+    for path in (west_workspace_path, artifacts_path, artifacts_path / "output"):
+        path.mkdir(parents=True, exist_ok=True)
+
+
 def clean_west_workspace(west_workspace_path: Path):
-    """Delete the local west workspace contents so dependencies will be re-fetched."""
+    """Delete the local west workspace contents so dependencies will be re-fetched.
+
+    The workspace can hold tens of thousands of files from the zephyr/zmk
+    checkouts, so rename it aside (O(1)) and reap the renamed tree with a
+    detached background rm -rf instead of blocking on a synchronous rmtree.
+    (ensure_build_directories recreates the empty directory afterwards; the
+    rename also clears hidden files like .west/.)
+    """
     if not west_workspace_path.exists():
         return
 
-    # Remove entirely to ensure hidden files like .west/ are cleared.
-    shutil.rmtree(west_workspace_path, ignore_errors=True)
-    west_workspace_path.mkdir(parents=True, exist_ok=True)
+    trash_path = west_workspace_path.with_name(
+        west_workspace_path.name + '.trash-' + os.urandom(4).hex())
+    try:
+        os.rename(west_workspace_path, trash_path)
+    except OSError:
+        # Rename failed (e.g. something holds the directory); remove in place.
+        shutil.rmtree(west_workspace_path, ignore_errors=True)
+        return
+
+    try:
+        subprocess.Popen(['rm', '-rf', str(trash_path)],
+                         start_new_session=True,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        shutil.rmtree(trash_path, ignore_errors=True)
 
 
 def clean_artifacts(artifacts_path: Path):
@@ -77,39 +223,202 @@ def clean_artifacts(artifacts_path: Path):
     if not artifacts_path.exists():
         return
     shutil.rmtree(artifacts_path, ignore_errors=True)
-    artifacts_path.mkdir(parents=True, exist_ok=True)
 
 
-def build_docker_command(build_config, workspace_path):
-    """Construct the Docker build command."""
-    board = build_config.get('board')
-    shield = build_config.get('shield')
-    snippet = build_config.get('snippet')
-    cmake_args = build_config.get('cmake-args')
-
-    # Sanitize shield name for build directory (replace spaces and underscores with hyphens)
-    shield_dir = shield.replace(' ', '-').replace('_', '-')
-    build_dir = f"manual_build/artifacts/{shield_dir}"
-
-    # Keep west-managed checkouts out of the repo root by using a dedicated west workspace directory
-    # under manual_build/ (gitignored). We mount:
-    # - /repo      -> the git repo (source-of-truth for config + custom shields module)
-    # - /workspace -> the west workspace (contains zephyr/zmk/modules checkouts)
-    # - /out       -> build output/artifacts directory
-    west_workspace_host = workspace_path / "manual_build" / "west-workspace"
-    artifacts_host = workspace_path / "manual_build" / "artifacts"
-
-    build_dir_in_container = f"/out/{shield_dir}"
-
-    # Base Docker command
-    docker_cmd = [
-        "docker", "run", "--rm",
+DOCKER_IMAGE = "zmkfirmware/zmk-build-arm:stable"
+CONTAINER_NAME = "zmk-builder"
+
+
+def resolve_builder_image(workspace_path):
+    """Return (image_ref, pinned) for the build container.
+
+    Resolves the stable tag to its repo digest once and caches it in
+    manual_build/.docker-image-digest; later runs reuse the digest and can pass
+    --pull=never so docker never consults the registry. Falls back to the plain
+    tag (with default pull behavior) when no digest can be resolved.
+    """
+    digest_file = workspace_path / "manual_build" / ".docker-image-digest"
+    try:
+        digest = digest_file.read_text().strip()
+        if digest:
+            return digest, True
+    except OSError:
+        pass
+
+    inspect_cmd = ["docker", "inspect", "--format", "{{index .RepoDigests 0}}", DOCKER_IMAGE]
+    try:
+        result = subprocess.run(inspect_cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            # Image not present yet: pull the tag once, then resolve its digest.
+            subprocess.run(["docker", "pull", DOCKER_IMAGE], check=True)
+            result = subprocess.run(inspect_cmd, capture_output=True, text=True, check=True)
+        digest = result.stdout.strip()
+        if digest:
+            try:
+                digest_file.write_text(digest + "\n")
+            except OSError:
+                pass
+            return digest, True
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return DOCKER_IMAGE, False
+
+
+def _start_builder_container(workspace_path, west_workspace_path, artifacts_path,
+                             image_ref, pinned):
+    """Start the detached builder container from the given image reference."""
+    run_cmd = ["docker", "run", "-d", "--name", CONTAINER_NAME]
+    if pinned:
+        run_cmd.append("--pull=never")
+    run_cmd += [
         "-v", f"{workspace_path}:/repo",
-        "-v", f"{west_workspace_host}:/workspace",
-        "-v", f"{artifacts_host}:/out",
+        "-v", f"{west_workspace_path}:/workspace",
+        "-v", f"{artifacts_path}:/out",
         "-w", "/workspace",
-        "zmkfirmware/zmk-build-arm:stable",
-        "sh", "-c"
+        image_ref,
+        "sleep", "infinity",
+    ]
+    subprocess.run(run_cmd, check=True, capture_output=True, text=True)
+
+
+def _workspace_visible_in_container(west_workspace_path):
+    """Check that /workspace in the container really is this host directory.
+
+    Catches the case where the workspace was deleted and recreated by hand
+    (not via --clean): the path looks the same but the container's bind mount
+    still pins the old, deleted inode, so files staged on the host would be
+    invisible inside. A random token is round-tripped through the mount.
+    """
+    token = os.urandom(8).hex()
+    probe = west_workspace_path / ".container-probe"
+    try:
+        probe.write_text(token)
+        result = subprocess.run(
+            ["docker", "exec", CONTAINER_NAME, "cat", "/workspace/.container-probe"],
+            capture_output=True, text=True)
+        return result.returncode == 0 and result.stdout.strip() == token
+    except OSError:
+        return False
+    finally:
+        try:
+            probe.unlink()
+        except OSError:
+            pass
+
+
+def ensure_builder_container(workspace_path, west_workspace_path, artifacts_path):
+    """Make sure the long-lived zmk-builder container is running.
+
+    Builds run via `docker exec` into this container instead of paying the
+    container setup/teardown cost of `docker run --rm` on every invocation.
+    The container just sleeps between builds; it is removed by --clean (its
+    bind mounts would otherwise pin the deleted west workspace).
+
+    A pre-existing container is reused only when its bind mounts match this
+    checkout's directories and its /workspace is really the current host
+    directory; a stale or foreign container (second checkout, workspace
+    removed by hand) is replaced instead of producing opaque exec failures.
+    """
+    expected_mounts = {
+        str(workspace_path): "/repo",
+        str(west_workspace_path): "/workspace",
+        str(artifacts_path): "/out",
+    }
+    try:
+        result = subprocess.run(["docker", "inspect", CONTAINER_NAME],
+                                capture_output=True, text=True)
+        if result.returncode == 0:
+            try:
+                info = json.loads(result.stdout)[0]
+            except (ValueError, IndexError):
+                info = {}
+
+            reusable = False
+            mounts = {mount.get("Source"): mount.get("Destination")
+                      for mount in info.get("Mounts", [])}
+            if mounts == expected_mounts:
+                if not info.get("State", {}).get("Running"):
+                    # Container exists but is stopped (e.g. after a daemon restart).
+                    subprocess.run(["docker", "start", CONTAINER_NAME], check=True,
+                                   capture_output=True, text=True)
+                reusable = _workspace_visible_in_container(west_workspace_path)
+            if reusable:
+                return
+
+            print(f"Existing {CONTAINER_NAME} container doesn't match this checkout; recreating it.")
+            remove_builder_container()
+
+        image_ref, pinned = resolve_builder_image(workspace_path)
+        try:
+            _start_builder_container(workspace_path, west_workspace_path,
+                                     artifacts_path, image_ref, pinned)
+        except subprocess.CalledProcessError:
+            if not pinned:
+                raise
+            # The cached digest can go stale when the image is pruned locally;
+            # drop it and re-resolve, which pulls the tag again if needed.
+            try:
+                (workspace_path / "manual_build" / ".docker-image-digest").unlink()
+            except OSError:
+                pass
+            image_ref, pinned = resolve_builder_image(workspace_path)
+            _start_builder_container(workspace_path, west_workspace_path,
+                                     artifacts_path, image_ref, pinned)
+    except (OSError, subprocess.CalledProcessError) as e:
+        detail = e.stderr.strip() if getattr(e, 'stderr', None) else e
+        print(f"Error: could not start the {CONTAINER_NAME} Docker container: {detail}")
+        sys.exit(1)
+
+
+def remove_builder_container():
+    """Remove the long-lived builder container if it exists (best-effort)."""
+    try:
+        subprocess.run(["docker", "rm", "-f", CONTAINER_NAME], capture_output=True)
+    except OSError:
+        pass
+
+
+# Shell helper prepended to the staged build script. rsync only rewrites files
+# that changed, so repeat builds skip re-copying unchanged config/boards/dts
+# trees; fall back to the old rm + cp when the image lacks rsync.
+_SYNC_TREE_SH = """\
+sync_tree() {
+    if command -v rsync >/dev/null 2>&1; then
+        rsync -a --delete "$1" "$2"
+    else
+        rm -rf "$2" && cp -R "${1%/}" "$2"
+    fi
+}
+"""
+
+
+def build_docker_command(build_config, workspace_path, west_workspace_host):
+    """Construct the Docker build command."""
+    board = build_config.board
+    shield = build_config.shield
+    snippet = build_config.snippet
+    cmake_args = build_config.cmake_args
+
+    # Sanitize shield and board names for the build directory (replace spaces and
+    # underscores with hyphens). The board is part of the name because the same
+    # shield can be built for several boards (settings_reset is in build.yaml for
+    # both nice_nano and xiao_ble), and concurrent builds must never share a
+    # build directory or staged script.
+    build_dir_name = f"{shield} {board}".replace(' ', '-').replace('_', '-')
+
+    build_dir_in_container = f"/out/{build_dir_name}"
+
+    # Base Docker command: exec into the long-lived builder container (started
+    # by ensure_builder_container, which carries the /repo, /workspace and /out
+    # mounts). The actual build steps are staged as a script in the west
+    # workspace, so the container shell parses one small argv and one script
+    # instead of a giant `sh -c` command line. Per-shield script name so
+    # parallel builds don't clobber each other.
+    script_name = f".build-{build_dir_name}.sh"
+    docker_cmd = [
+        "docker", "exec", "-w", "/workspace",
+        CONTAINER_NAME,
+        "sh", f"/workspace/{script_name}",
     ]
 
     # Build the west commands
@@ -117,23 +426,39 @@ def build_docker_command(build_config, workspace_path):
     west_commands.append('mkdir -p /workspace /out')
     # Be explicit about where we operate; west init/update/build must run from the workspace root.
     west_commands.append('cd /workspace')
+    # Serialize the shared workspace setup (syncs, west init/update) across
+    # concurrent build containers; west build itself runs unlocked since each
+    # build has its own directory under /out.
+    west_commands.append('exec 9>/workspace/.west.lock')
+    west_commands.append('flock 9')
     # Copy config into the workspace so west init -l can initialize *here*.
     # (If the local manifest repo is outside the workspace, west may initialize in the manifest dir.)
-    west_commands.append('rm -rf /workspace/config && cp -R /repo/config /workspace/config')
-
-    # Copy this repo's custom shields as a proper module inside the workspace (avoid name collision
+    # The config/boards/dts syncs touch disjoint destinations, so run them as
+    # background jobs and wait for each pid before west init. Waiting per pid
+    # (rather than a bare `wait`) keeps `set -e` aborting on any failed sync.
+    west_commands.append('mkdir -p /workspace/zmk-config-charybdis/zephyr')
+    west_commands.append('sync_tree /repo/config/ /workspace/config & sync_config=$!')
+    # Sync this repo's custom shields as a proper module inside the workspace (avoid name collision
     # with the zephyr checkout at /workspace/zephyr).
-    west_commands.append('rm -rf /workspace/zmk-config-charybdis && mkdir -p /workspace/zmk-config-charybdis/zephyr')
-    west_commands.append('if [ -d /repo/boards ]; then cp -R /repo/boards /workspace/zmk-config-charybdis/; fi')
-    west_commands.append('if [ -d /repo/dts ]; then cp -R /repo/dts /workspace/zmk-config-charybdis/; fi')
+    west_commands.append('( if [ -d /repo/boards ]; then sync_tree /repo/boards/ /workspace/zmk-config-charybdis/boards; else rm -rf /workspace/zmk-config-charybdis/boards; fi ) & sync_boards=$!')
+    west_commands.append('( if [ -d /repo/dts ]; then sync_tree /repo/dts/ /workspace/zmk-config-charybdis/dts; else rm -rf /workspace/zmk-config-charybdis/dts; fi ) & sync_dts=$!')
     west_commands.append('if [ -f /repo/zephyr/module.yml ]; then cp /repo/zephyr/module.yml /workspace/zmk-config-charybdis/zephyr/module.yml; fi')
+    west_commands.append('wait $sync_config')
+    west_commands.append('wait $sync_boards')
+    west_commands.append('wait $sync_dts')
 
     # Init the west workspace at /workspace, using the copied local manifest repo at /workspace/config.
     west_commands.append('[ -d .west ] || west init -l /workspace/config')
-    # Fetch dependencies only when missing (first run or after --clean).
+    # Fetch dependencies only when missing (first run or after --clean) or when
+    # the manifest changed since the last successful update. The recorded hash
+    # is only advanced after west update succeeds (set -e aborts before the mv),
+    # so a failed fetch retries next build.
     west_commands.append('cd /workspace')
-    west_commands.append('if [ ! -d zmk ]; then west update; fi')
+    west_commands.append('sha256sum /workspace/config/west.yml > /workspace/.west-manifest.sha.new')
+    west_commands.append('if [ ! -d zmk ] || ! cmp -s /workspace/.west-manifest.sha.new /workspace/.west-manifest.sha; then west update; fi')
+    west_commands.append('mv /workspace/.west-manifest.sha.new /workspace/.west-manifest.sha')
     west_commands.append('west zephyr-export')
+    west_commands.append('exec 9>&-')
 
     # Construct west build command (quote build_dir in case shield name has spaces)
     # Use --pristine to automatically clean build directory (prevents board mismatch errors)
@@ -166,20 +491,24 @@ def build_docker_command(build_config, workspace_path):
 
     west_commands.append(" ".join(build_cmd_parts))
 
-    # Combine all commands
-    full_command = " && ".join(west_commands)
-    docker_cmd.append(full_command)
+    # Write the build script to the host side of the west workspace mount.
+    # `set -e` gives the same stop-on-first-failure behavior as the old
+    # `&&`-chained command string.
+    script = "#!/bin/sh\nset -e\n" + _SYNC_TREE_SH + "\n".join(west_commands) + "\n"
+    (west_workspace_host / script_name).write_text(script)
 
-    return docker_cmd, build_dir
+    return docker_cmd, build_dir_name
 
 
-def run_build(docker_cmd, shield_name):
+def run_build(docker_cmd, shield_name, verbose=False):
     """Execute the Docker build command."""
+    summary = ' '.join(docker_cmd[:7])
     print(f"\n{'='*60}")
     print(f"Building: {shield_name}")
     print(f"{'='*60}\n")
-    print(f"Running: {' '.join(docker_cmd[:7])}...")
-    print(f"\nFull command string:\n{docker_cmd[-1]}\n")
+    print(f"Running: {summary}...")
+    if verbose:
+        print(f"\nBuild script (in container): {docker_cmd[-1]}\n")
     print()
 
     try:
@@ -198,14 +527,73 @@ def run_build(docker_cmd, shield_name):
         sys.exit(1)
 
 
-def copy_firmware_to_output(workspace_path, build_dir, shield_name, board_name):
+def run_build_batch(selected_builds, workspace_path, west_workspace_path, artifacts_path,
+                    jobs, verbose=False):
+    """Build several configurations in parallel Docker containers.
+
+    Each build gets its own staged script and build directory under /out; the
+    shared west workspace setup is serialized inside the containers via flock.
+    Output is captured per build so parallel logs don't interleave, persisted
+    to <build dir>/build.log (warnings stay inspectable after a successful
+    run), and replayed on failure. Returns True only if every build succeeded.
+    """
+    print(f"\n{'='*60}")
+    print(f"Building {len(selected_builds)} configurations with {jobs} parallel job(s)")
+    print(f"{'='*60}\n")
+
+    def run_one(build_config):
+        shield = build_config.shield
+        docker_cmd, build_dir_name = build_docker_command(build_config, workspace_path,
+                                                          west_workspace_path)
+        print(f"→ Started: {shield}", flush=True)
+        result = subprocess.run(docker_cmd, capture_output=True, text=True)
+        return build_config, build_dir_name, result
+
+    all_ok = True
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_one, build) for build in selected_builds]
+        for future in as_completed(futures):
+            build_config, build_dir_name, result = future.result()
+            shield = build_config.shield
+            board = build_config.board
+
+            # Persist the captured output so compiler/devicetree warnings from
+            # successful builds aren't silently dropped.
+            log_file = artifacts_path / build_dir_name / "build.log"
+            log_text = result.stdout or ''
+            if result.stderr:
+                log_text += "\n--- stderr ---\n" + result.stderr
+            try:
+                log_file.parent.mkdir(parents=True, exist_ok=True)
+                log_file.write_text(log_text)
+                log_note = f" (log: {log_file.relative_to(workspace_path)})"
+            except OSError:
+                log_note = ""
+
+            if result.returncode == 0:
+                print(f"✓ Succeeded: {shield}{log_note}", flush=True)
+                if verbose and result.stdout:
+                    print(result.stdout)
+                copy_firmware_to_output(artifacts_path, build_dir_name, shield, board)
+            else:
+                all_ok = False
+                print(f"✗ Failed: {shield} (exit code {result.returncode}){log_note}", flush=True)
+                # Replay the captured output so the failure is debuggable.
+                if result.stdout:
+                    print(result.stdout)
+                if result.stderr:
+                    print(result.stderr, file=sys.stderr)
+
+    return all_ok
+
+
+def copy_firmware_to_output(artifacts_path, build_dir_name, shield_name, board_name):
     """Copy the built firmware to the output directory with a clean name."""
-    # Create output directory if it doesn't exist
-    output_dir = workspace_path / "manual_build" / "artifacts" / "output"
-    output_dir.mkdir(parents=True, exist_ok=True)
+    # The output directory is created at startup by ensure_build_directories.
+    output_dir = artifacts_path / "output"
 
     # Source file
-    source_file = workspace_path / build_dir / "zephyr" / "zmk.uf2"
+    source_file = artifacts_path / build_dir_name / "zephyr" / "zmk.uf2"
 
     # Generate output filename: shield-board.uf2
     # Replace underscores with hyphens for consistency
@@ -214,10 +602,11 @@ def copy_firmware_to_output(workspace_path, build_dir, shield_name, board_name):
     output_filename = f"{shield_clean}-{board_clean}.uf2"
     output_file = output_dir / output_filename
 
-    # Copy the file
+    # Copy the file. copyfile skips copy2's stat/chmod/utime metadata calls
+    # (irrelevant for a build artifact) and uses in-kernel os.sendfile on Linux.
     try:
         if source_file.exists():
-            shutil.copy2(source_file, output_file)
+            shutil.copyfile(source_file, output_file)
             print(f"✓ Firmware copied to: manual_build/artifacts/output/{output_filename}")
             return output_file
         else:
@@ -228,8 +617,8 @@ def copy_firmware_to_output(workspace_path, build_dir, shield_name, board_name):
         return None
 
 
-def parse_arguments():
-    """Parse command-line arguments."""
+def parse_arguments(argv=None):
+    """Parse command-line arguments (from sys.argv when argv is None)."""
     parser = argparse.ArgumentParser(
         description='ZMK Local Build Script using Docker',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -249,50 +638,90 @@ Examples:
   
   # List available configurations
   ./build.py -l
+
+  # Build everything, four Docker builds at a time
+  ./build.py -a -j 4
         """
     )
     
     parser.add_argument('-n', '--number', type=int, metavar='N',
                         help='Build configuration number (1-based index)')
-    parser.add_argument('-s', '--shield', type=str, metavar='SHIELD',
-                        help='Shield name (or partial match)')
+    parser.add_argument('-s', '--shield', type=str, metavar='SHIELD', action='append',
+                        help='Shield name (or partial match); repeat to build several shields as a batch')
     parser.add_argument('-b', '--board', type=str, metavar='BOARD',
                         help='Board name (used with --shield for exact match)')
     parser.add_argument('-l', '--list', action='store_true',
                         help='List available build configurations and exit')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Print the full build command details before running')
+    parser.add_argument('-a', '--all', action='store_true',
+                        help='Build every configuration in build.yaml')
+    parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                        help='Number of parallel Docker builds in batch mode (default: one per CPU, capped at the number of builds)')
     parser.add_argument('--clean', '--clean-deps', dest='clean_deps', action='store_true',
                         help='Delete the local west workspace (manual_build/west-workspace/) and re-download dependencies on the next build')
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
-def find_build_by_criteria(builds, shield=None, board=None):
-    """Find a build configuration by shield and/or board name."""
+# Query count above which the pyahocorasick automaton beats per-query scans.
+_AC_QUERY_THRESHOLD = 8
+
+
+def _multi_query_matcher(queries):
+    """Return a predicate testing whether any query is a substring of a text.
+
+    For large query batches (e.g. a scripted CI matrix), build an Aho-Corasick
+    automaton so each shield string is scanned once for all patterns instead
+    of once per pattern. pyahocorasick is an optional dependency; without it
+    (or below the threshold) a plain substring loop is used.
+    """
+    if len(queries) > _AC_QUERY_THRESHOLD:
+        try:
+            import ahocorasick
+        except ImportError:
+            pass
+        else:
+            automaton = ahocorasick.Automaton()
+            for query in queries:
+                automaton.add_word(query, query)
+            automaton.make_automaton()
+            return lambda text: next(automaton.iter(text), None) is not None
+    return lambda text: any(query in text for query in queries)
+
+
+def find_build_by_criteria(builds, shields=None, board=None):
+    """Find build configurations by shield and/or board name.
+
+    shields is an optional list of queries; a build matches when any query is
+    a substring of its shield. Board matches exactly.
+    """
     matches = []
-    
+
+    shield_ok = _multi_query_matcher([s.lower() for s in shields]) if shields else None
+    board_query = board.lower() if board else None
+
     for idx, build in enumerate(builds):
-        build_shield = build.get('shield', '')
-        build_board = build.get('board', '')
-        
-        # Check if shield matches (partial or exact)
-        shield_match = not shield or shield.lower() in build_shield.lower()
-        
-        # Check if board matches (exact)
-        board_match = not board or board.lower() == build_board.lower()
-        
+        # The entries carry pre-lowercased names so nothing is re-lowered per call.
+        shield_match = shield_ok is None or shield_ok(build.shield_lower)
+        board_match = not board_query or board_query == build.board_lower
+
         if shield_match and board_match:
             matches.append((idx, build))
-    
+
     return matches
 
 
-def main():
-    """Main entry point."""
-    # Get the absolute path of the workspace (parent of manual_build)
+def main(argv=None):
+    """Main entry point. argv overrides sys.argv for library callers."""
+    # Get the absolute path of the workspace (parent of manual_build) and
+    # derive the well-known host directories once, up front.
     workspace_path = Path(__file__).parent.parent.resolve()
+    west_workspace_path = workspace_path / "manual_build" / "west-workspace"
+    artifacts_path = workspace_path / "manual_build" / "artifacts"
 
     # Parse command-line arguments
-    args = parse_arguments()
+    args = parse_arguments(argv)
 
     print("╔════════════════════════════════════════════╗")
     print("║   ZMK Local Build Script (Docker)          ║")
@@ -310,10 +739,14 @@ def main():
         display_build_options(builds)
         sys.exit(0)
 
-    # Determine which build to use
+    # Determine which build(s) to use
     selected_build = None
-    
-    if args.number:
+    selected_builds = None  # Batch selection; built after the workspace is ready.
+
+    if args.all:
+        selected_builds = builds
+
+    elif args.number:
         # Build by number
         if 1 <= args.number <= len(builds):
             selected_build = builds[args.number - 1]
@@ -329,7 +762,7 @@ def main():
         if not matches:
             print(f"Error: No build configuration found matching criteria:")
             if args.shield:
-                print(f"  Shield: {args.shield}")
+                print(f"  Shield: {', '.join(args.shield)}")
             if args.board:
                 print(f"  Board: {args.board}")
             print("\nAvailable configurations:")
@@ -339,12 +772,19 @@ def main():
         elif len(matches) == 1:
             idx, selected_build = matches[0]
             print(f"\nFound matching build #{idx + 1}:")
-            print(f"  {selected_build.get('shield')} ({selected_build.get('board')})")
+            print(f"  {selected_build.shield} ({selected_build.board})")
         
+        elif args.shield and len(args.shield) > 1:
+            # Several -s queries select a batch to build together.
+            print(f"\nMatched {len(matches)} builds:")
+            for idx, build in matches:
+                print(f"  {idx + 1}. {build.shield} ({build.board})")
+            selected_builds = [build for _, build in matches]
+
         else:
             print(f"\nMultiple builds match your criteria:")
             for idx, build in matches:
-                print(f"  {idx + 1}. {build.get('shield')} ({build.get('board')})")
+                print(f"  {idx + 1}. {build.shield} ({build.board})")
             print("\nPlease specify more precise criteria or use -n with the build number")
             sys.exit(1)
     
@@ -354,15 +794,12 @@ def main():
         choice = get_user_choice(len(builds))
         selected_build = builds[choice]
 
-    # Ensure the west workspace dir exists on the host (bind-mounted into the container)
-    west_workspace_path = workspace_path / "manual_build" / "west-workspace"
-    west_workspace_path.mkdir(parents=True, exist_ok=True)
-
-    artifacts_path = workspace_path / "manual_build" / "artifacts"
-    artifacts_path.mkdir(parents=True, exist_ok=True)
-
     # Optional dependency cleanup happens on the host BEFORE running Docker.
     if args.clean_deps:
+        # The builder container's bind mounts would pin the old workspace
+        # directory, so drop the container before deleting the tree.
+        remove_builder_container()
+
         print("\nCleaning dependency workspace: manual_build/west-workspace/", flush=True)
         clean_west_workspace(west_workspace_path)
         print("Dependency workspace cleaned.", flush=True)
@@ -371,20 +808,34 @@ def main():
         clean_artifacts(artifacts_path)
         print("Build artifacts cleaned.\n", flush=True)
 
+    # Ensure all host-side dirs exist (bind-mounted into the container) in one
+    # pass, then make sure the long-lived builder container is up.
+    ensure_build_directories(west_workspace_path, artifacts_path)
+    ensure_builder_container(workspace_path, west_workspace_path, artifacts_path)
+
+    # Batch mode (--all or several -s queries): build in parallel and exit.
+    if selected_builds is not None:
+        jobs = args.jobs if args.jobs else min(len(selected_builds), os.cpu_count() or 1)
+        jobs = max(1, jobs)
+        success = run_build_batch(selected_builds, workspace_path, west_workspace_path,
+                                  artifacts_path, jobs, verbose=args.verbose)
+        sys.exit(0 if success else 1)
+
     # Build Docker command
-    docker_cmd, build_dir = build_docker_command(selected_build, workspace_path)
+    docker_cmd, build_dir_name = build_docker_command(selected_build, workspace_path,
+                                                      west_workspace_path)
 
     # Run the build
-    shield_name = selected_build.get('shield')
-    board_name = selected_build.get('board')
-    success = run_build(docker_cmd, shield_name)
+    shield_name = selected_build.shield
+    board_name = selected_build.board
+    success = run_build(docker_cmd, shield_name, verbose=args.verbose)
 
     if success:
-        original_output = workspace_path / build_dir / "zephyr" / "zmk.uf2"
+        original_output = artifacts_path / build_dir_name / "zephyr" / "zmk.uf2"
         print(f"\nOriginal output: {original_output}")
 
         # Copy to organized output directory
-        output_file = copy_firmware_to_output(workspace_path, build_dir, shield_name, board_name)
+        output_file = copy_firmware_to_output(artifacts_path, build_dir_name, shield_name, board_name)
 
         if output_file:
             print(f"\nTo flash: Copy the firmware to your board's USB drive")
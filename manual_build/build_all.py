@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Batch driver for build.py
+Imports build.main once so interpreter startup and the yaml import are paid a
+single time for the whole batch, then builds every configuration in build.yaml.
+Extra arguments (e.g. -j 4, --verbose) are passed through to build.py.
+"""
+
+import sys
+
+from build import main
+
+if __name__ == "__main__":
+    main(['--all'] + sys.argv[1:])